@@ -1,31 +1,60 @@
 # ── backend/main.py ─────────────────────────────────────────────────────────
 
 import os
-import json
+import asyncio
 import traceback
 import re
 import hashlib
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
+import orjson
+from cachetools import LRUCache
 from google.genai import types
 import google.genai as genai
 from google.genai.types import HttpOptions
 
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from backend.pdf_utils import (
     extract_text_or_ocr_from_pdf,
     normalize_and_segment,
+    shutdown_ocr_pool,
 )
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting Rubric Analyzer API")
+    logger.info(f"Google Cloud Project: {os.environ.get('GOOGLE_CLOUD_PROJECT')}")
+    logger.info(f"Google Cloud Location: {os.environ.get('GOOGLE_CLOUD_LOCATION')}")
+    logger.info(f"Using Vertex AI: {os.environ.get('GOOGLE_GENAI_USE_VERTEXAI')}")
+
+    # One client per process, created at startup and shared by every request
+    # so the async client's HTTP connection pool is reused
+    try:
+        app.state.genai_client = genai.Client(http_options=HttpOptions(api_version="v1"))
+        logger.info("Generative AI client initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize Generative AI client - check your Google Cloud setup: {e}")
+        app.state.genai_client = None
+
+    yield
+
+    if app.state.genai_client is not None:
+        await app.state.genai_client.aio.aclose()
+        app.state.genai_client = None
+    await run_in_threadpool(shutdown_ocr_pool)
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -47,14 +76,21 @@ os.environ["GOOGLE_CLOUD_PROJECT"] = "rubric-analyzer"
 os.environ["GOOGLE_CLOUD_LOCATION"] = "global"
 os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
 
-try:
-    genai_client = genai.Client(http_options=HttpOptions(api_version="v1"))
-    logger.info("Generative AI client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Generative AI client: {e}")
-    genai_client = None
+parsed_rubrics = LRUCache(maxsize=2048)  # In-memory store: rubric_id -> parsed rubric JSON
+# Scoring is deterministic (temperature 0), so results are reused for a repeated
+# (rubric, essay) pair: digest of rubric_id + essay text -> List[LLMMatch]
+scored_essays = LRUCache(maxsize=1024)
+
+# Criteria scored per Gemini call, and the cap on concurrent Gemini calls
+SCORE_CHUNK_SIZE = 8
+_gemini_semaphore = asyncio.Semaphore(8)
+
+# Bounds for max_output_tokens, which is otherwise sized from the request
+MIN_OUTPUT_TOKENS = 256
+MAX_OUTPUT_TOKENS = 4096
 
-parsed_rubrics = {}  # In-memory store: rubric_id -> parsed rubric JSON
+# Section headings recognised by /structure and /structure_pdf
+_HEADING_RE = re.compile(r"^(Introduction|Conclusion|Discussion)\b.*$", re.I | re.M)
 
 class TextIn(BaseModel):
     text: str
@@ -70,6 +106,26 @@ class Section(BaseModel):
     name: str
     text: str
 
+# Response schemas passed to Gemini structured output
+class RubricLevel(BaseModel):
+    score: int
+    description: str
+
+class RubricCriterion(BaseModel):
+    key: str
+    max_score: int
+    levels: List[RubricLevel]
+
+class ScoreOutput(BaseModel):
+    criterion: str
+    score: int
+    snippet: Optional[str] = None
+    suggestion: Optional[str] = None
+
+class EssayScoreOutput(BaseModel):
+    id: str
+    matches: List[ScoreOutput]
+
 class LLMMatch(BaseModel):
     criterion: str
     score: int
@@ -77,21 +133,55 @@ class LLMMatch(BaseModel):
     snippet: Optional[str] = None
     suggestion: Optional[str] = None
 
+class EssayIn(BaseModel):
+    id: str
+    text: str
+
+class BatchScoreIn(BaseModel):
+    rubric_id: str
+    essays: List[EssayIn]
+
+class EssayScores(BaseModel):
+    id: str
+    matches: List[LLMMatch]
+
+def split_sections(text: str) -> List[Section]:
+    """Split essay text into sections at Introduction/Conclusion/Discussion headings."""
+    sections = []
+    current = "Body"
+    start = 0
+
+    # Heading lines are rare, so one scan over the whole text finds them all;
+    # each section is the slice between consecutive heading lines.
+    for m in _HEADING_RE.finditer(text):
+        body = text[start:m.start()].strip()
+        if body:
+            sections.append(Section.model_construct(name=current, text=body))
+        current = m.group(1).title()
+        start = m.end()
+
+    body = text[start:].strip()
+    if body:
+        sections.append(Section.model_construct(name=current, text=body))
+    return sections
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
-        "genai_client_initialized": genai_client is not None,
-        "parsed_rubrics_count": len(parsed_rubrics)
+        "genai_client_initialized": app.state.genai_client is not None,
+        "parsed_rubrics_count": len(parsed_rubrics),
+        "scored_essays_count": len(scored_essays)
     }
 
 @app.get("/test_ai")
 async def test_ai():
+    genai_client = app.state.genai_client
     if not genai_client:
         raise HTTPException(status_code=500, detail="AI client not initialized")
     
     try:
-        resp = genai_client.models.generate_content(
+        resp = await genai_client.aio.models.generate_content(
             model="gemini-2.0-flash-001",
             contents=["Return only this JSON without any markdown formatting: {\"message\": \"Hello, this is a test!\"}"],
             config=types.GenerateContentConfig(temperature=0.0, max_output_tokens=100),
@@ -113,6 +203,54 @@ async def test_ai():
         logger.error(f"AI test failed: {e}")
         raise HTTPException(status_code=500, detail=f"AI test failed: {str(e)}")
 
+def _max_output_tokens(estimate: int) -> int:
+    """Clamp an estimated response size to the max_output_tokens bounds."""
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, estimate))
+
+def _json_config(response_schema, max_tokens: int) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        temperature=0.0,
+        max_output_tokens=max_tokens,
+        response_mime_type="application/json",
+        response_schema=response_schema,
+    )
+
+async def _generate_json(prompt: str, response_schema, max_tokens: int):
+    """
+    Run one structured-output Gemini call and return the parsed JSON.
+    A response cut off at the token limit is retried once with twice the
+    budget, up to MAX_OUTPUT_TOKENS.
+    """
+    for attempt in range(2):
+        try:
+            async with _gemini_semaphore:
+                resp = await app.state.genai_client.aio.models.generate_content(
+                    model="gemini-2.0-flash-001",
+                    contents=[prompt],
+                    config=_json_config(response_schema, max_tokens),
+                )
+        except Exception as e:
+            logger.error(f"Gemini API error: {e}")
+            raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+
+        if not resp.candidates or not resp.candidates[0].content.parts:
+            raise HTTPException(status_code=500, detail="No response from AI service")
+
+        raw_response = resp.candidates[0].content.parts[0].text
+        logger.info(f"Raw AI response: {raw_response[:200]}...")
+
+        try:
+            return orjson.loads(raw_response)
+        except orjson.JSONDecodeError as e:
+            truncated = resp.candidates[0].finish_reason == types.FinishReason.MAX_TOKENS
+            if attempt == 0 and truncated and max_tokens < MAX_OUTPUT_TOKENS:
+                max_tokens = min(max_tokens * 2, MAX_OUTPUT_TOKENS)
+                logger.warning(f"AI response was cut off ({e}), retrying with max_output_tokens={max_tokens}")
+                continue
+            logger.error(f"JSON decode error: {e}")
+            logger.error(f"Raw response: {raw_response}")
+            raise HTTPException(status_code=500, detail=f"AI returned invalid JSON: {str(e)}")
+
 @app.post("/parse_rubric", response_model=dict)
 async def parse_rubric(data: RubricIn):
     try:
@@ -125,129 +263,38 @@ async def parse_rubric(data: RubricIn):
             return {"rubric_id": rubric_id}
 
         prompt = f"""
-You are a rubric parsing assistant. Parse this rubric text and return ONLY a JSON array with no extra text, no markdown formatting.
+You are a rubric parsing assistant. Parse this rubric text into a JSON array of criteria.
 
 Each criterion should be an object with:
 - "key": the criterion name (string)
-- "max_score": highest possible points (integer)  
-- "levels": object with score numbers as keys and descriptions as values
-
-Example format:
-[
-  {{
-    "key": "Thesis",
-    "max_score": 1,
-    "levels": {{
-      "1": "Clear thesis statement",
-      "0": "Missing or unclear thesis"
-    }}
-  }}
-]
+- "max_score": highest possible points (integer)
+- "levels": one entry per score level, each with "score" (integer) and "description" (string)
 
 Rubric text to parse:
-{raw}
-
-Return only the JSON array:"""
+{raw}"""
         
         logger.info("Sending request to Gemini...")
         
         # Check if the client is properly initialized
-        if not genai_client:
+        if not app.state.genai_client:
             raise HTTPException(status_code=500, detail="Generative AI client not initialized")
         
-        try:
-            resp = genai_client.models.generate_content(
-                model="gemini-2.0-flash-001",
-                contents=[prompt],
-                config=types.GenerateContentConfig(temperature=0.0, max_output_tokens=800),
-            )
-        except Exception as e:
-            logger.error(f"Gemini API error: {e}")
-            raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
-        
-        if not resp.candidates or not resp.candidates[0].content.parts:
-            raise HTTPException(status_code=500, detail="No response from AI service")
-        
-        raw_response = resp.candidates[0].content.parts[0].text
-        logger.info(f"Raw AI response: {raw_response[:200]}...")
-        
-        # Strip markdown formatting if present
-        cleaned_response = raw_response.strip()
-        if cleaned_response.startswith('```json'):
-            cleaned_response = cleaned_response[7:]  # Remove ```json
-        if cleaned_response.startswith('```'):
-            cleaned_response = cleaned_response[3:]   # Remove ```
-        if cleaned_response.endswith('```'):
-            cleaned_response = cleaned_response[:-3]  # Remove trailing ```
-        cleaned_response = cleaned_response.strip()
-        
-        # Fix common JSON formatting issues
-        # Replace unquoted property names with quoted ones
-        import re
-        # Fix unquoted keys: key: -> "key":
-        cleaned_response = re.sub(r'\b(\w+):', r'"\1":', cleaned_response)
-        # Fix double-quoted keys that got double-quoted: ""key"": -> "key":
-        cleaned_response = re.sub(r'""([^"]+)"":', r'"\1":', cleaned_response)
-        # Fix already quoted keys that got quoted again: "\"key\"": -> "key":
-        cleaned_response = re.sub(r'"\\"([^"]+)\\"":', r'"\1":', cleaned_response)
-        
-        logger.info(f"Cleaned response: {cleaned_response[:200]}...")
-        
-        try:
-            parsed = json.loads(cleaned_response)
-        except json.JSONDecodeError as e:
-            # Try one more fix - sometimes AI returns single quotes
-            try:
-                # Replace single quotes with double quotes (but be careful about apostrophes)
-                fixed_response = cleaned_response.replace("'", '"')
-                # Fix apostrophes back
-                fixed_response = re.sub(r'(\w)"(\w)', r"\1'\2", fixed_response)
-                parsed = json.loads(fixed_response)
-                logger.info("Successfully parsed after single quote fix")
-            except json.JSONDecodeError:
-                logger.error(f"JSON decode error: {e}")
-                logger.error(f"Raw response: {raw_response}")
-                logger.error(f"Cleaned response: {cleaned_response}")
-                # Try to extract just the JSON array part
-                try:
-                    import ast
-                    # Last resort: try to extract JSON-like content
-                    start = cleaned_response.find('[')
-                    end = cleaned_response.rfind(']') + 1
-                    if start >= 0 and end > start:
-                        json_part = cleaned_response[start:end]
-                        logger.info(f"Trying to parse extracted JSON: {json_part[:100]}...")
-                        parsed = json.loads(json_part)
-                    else:
-                        raise HTTPException(status_code=500, detail=f"AI returned invalid JSON: {str(e)}")
-                except:
-                    raise HTTPException(status_code=500, detail=f"AI returned invalid JSON: {str(e)}")
+        # The parsed rubric is roughly as long as the rubric text (~4 chars per token)
+        parsed = await _generate_json(
+            prompt, list[RubricCriterion], _max_output_tokens(max(800, len(raw) // 4))
+        )
         
         # Validate and normalize the parsed rubric
         if not isinstance(parsed, list):
             raise HTTPException(status_code=500, detail="AI response is not a list")
         
-        for i, item in enumerate(parsed):
-            if not isinstance(item, dict):
-                raise HTTPException(status_code=500, detail=f"Item {i} is not a dictionary")
-            
-            if "key" not in item or "max_score" not in item or "levels" not in item:
-                raise HTTPException(status_code=500, detail=f"Item {i} missing required fields")
-            
+        for item in parsed:
             ms = item["max_score"]
-            levels_raw = item["levels"]
-            
-            # Convert keys to int
-            levels = {}
-            for k, v in levels_raw.items():
-                try:
-                    levels[int(k)] = v
-                except (ValueError, TypeError):
-                    raise HTTPException(status_code=500, detail=f"Invalid level key: {k}")
-            
-            if not isinstance(ms, int) or ms < 1:
+            if ms < 1:
                 raise HTTPException(status_code=500, detail=f"Invalid max_score: {ms}")
             
+            levels = {level["score"]: level["description"] for level in item["levels"]}
+            
             # Ensure all levels from 0 to max_score exist
             for level_num in range(ms + 1):
                 if level_num not in levels:
@@ -271,7 +318,7 @@ Return only the JSON array:"""
 async def parse_rubric_pdf(file: UploadFile = File(...)):
     try:
         logger.info(f"Parsing PDF rubric: {file.filename}")
-        raw_text = extract_text_or_ocr_from_pdf(file)
+        raw_text = await run_in_threadpool(extract_text_or_ocr_from_pdf, file)
         normalized = "\n".join(normalize_and_segment(raw_text))
         logger.info(f"Extracted {len(normalized)} characters from PDF")
         return await parse_rubric(RubricIn(rubric_text=normalized))
@@ -282,6 +329,236 @@ async def parse_rubric_pdf(file: UploadFile = File(...)):
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"PDF rubric parsing error: {e}")
 
+def _criteria_block(rubric: List[dict]) -> str:
+    """Render the scoring guide for a group of criteria."""
+    criteria_block = ""
+    for item in rubric:
+        levels = item["levels"]
+        criteria_block += f"Criterion \"{item['key']}\" (max {item['max_score']} points):\n"
+        for level in sorted(levels.keys(), reverse=True):
+            criteria_block += f"  {level} points: \"{levels[level]}\"\n"
+        criteria_block += "\n"
+    return criteria_block
+
+def _scoring_prompt(essay_text: str, rubric: List[dict]) -> str:
+    """Build one prompt that scores the essay against every criterion in the group."""
+    return f"""
+Score this essay for each of the {len(rubric)} criteria below.
+
+Scoring guide:
+{_criteria_block(rubric)}
+Essay text:
+{essay_text}
+
+Return a JSON array with exactly {len(rubric)} objects, one per criterion in the order listed above.
+For each criterion give the criterion name, an integer score from 0 to its max, a supporting
+sentence quoted from the essay (or null), and a suggestion for improvement (or null)."""
+
+def _batch_scoring_prompt(essays: List[EssayIn], rubric: List[dict]) -> str:
+    """Build one prompt that scores several essays against the whole rubric."""
+    essays_block = ""
+    for essay in essays:
+        essays_block += f"---\nID: {essay.id}\n{essay.text}\n"
+
+    return f"""
+Grade each of the {len(essays)} essays below against all {len(rubric)} criteria.
+
+Scoring guide:
+{_criteria_block(rubric)}
+Essays:
+{essays_block}---
+
+Return a JSON array with one object per essay, each with the essay's "id" and "matches":
+an array of exactly {len(rubric)} objects, one per criterion in the order listed above.
+For each criterion give the criterion name, an integer score from 0 to its max, a supporting
+sentence quoted from that essay (or null), and a suggestion for improvement (or null)."""
+
+def _build_match(item: dict, scored: dict) -> LLMMatch:
+    """Turn one scored criterion from the LLM into an LLMMatch, clamping the score."""
+    key = item["key"]
+    max_score = item["max_score"]
+    score_val = scored["score"]
+
+    # Validate score range
+    if score_val < 0 or score_val > max_score:
+        logger.warning(f"Score {score_val} out of range for criterion {key}, clamping")
+        score_val = max(0, min(score_val, max_score))
+
+    # Fields are already typed by the response schema; skip re-validation
+    return LLMMatch.model_construct(
+        criterion=key,
+        score=score_val,
+        max_score=max_score,
+        snippet=scored.get("snippet"),
+        suggestion=scored.get("suggestion"),
+    )
+
+class _JsonArrayScanner:
+    """
+    Incrementally scans a streamed JSON array and returns each top-level
+    object as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0          # next index of _buf to scan
+        self._start = -1       # index in _buf where the open object began
+        self._depth = 0        # 1 = inside the top-level array
+        self._in_string = False
+        self._escape = False
+        self._closed = False
+
+    def feed(self, text: str) -> List[str]:
+        objects = []
+        if self._closed:
+            return objects
+
+        buf = self._buf + text
+        i = self._pos
+        if self._depth == 0:
+            i = buf.find("[", i)
+            if i < 0:
+                self._buf, self._pos = "", 0
+                return objects
+            self._depth = 1
+            i += 1
+
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{" or c == "[":
+                if self._depth == 1:
+                    self._start = i
+                self._depth += 1
+            elif c == "}" or c == "]":
+                self._depth -= 1
+                if self._depth == 1 and self._start >= 0:
+                    objects.append(buf[self._start:i + 1])
+                    self._start = -1
+                elif self._depth == 0:
+                    self._closed = True
+                    break
+            i += 1
+
+        # Keep only the unfinished object, if any
+        keep = self._start if self._start >= 0 else i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        if self._start >= 0:
+            self._start = 0
+        return objects
+
+def _unmatched_pairs(rubric: List[dict], parsed: list, matched: dict) -> List[tuple]:
+    """
+    Pair the criteria no result matched by name with the results no criterion
+    claimed, in order. Only done when the model returned one result per
+    criterion (so a reworded name is the likely cause); anything else is an
+    error. `matched` maps rubric index -> parsed index.
+    """
+    pending = [j for j in range(len(rubric)) if j not in matched]
+    if not pending:
+        return []
+    claimed = set(matched.values())
+    leftover = [i for i in range(len(parsed)) if i not in claimed]
+    if len(parsed) != len(rubric) or len(leftover) < len(pending):
+        missing = ", ".join(rubric[j]["key"] for j in pending)
+        logger.error(f"Scoring response: {parsed}")
+        raise HTTPException(status_code=500, detail=f"Scoring LLM returned no result for {missing}")
+    return list(zip(pending, leftover))
+
+def _match_results(rubric: List[dict], parsed) -> List[LLMMatch]:
+    """Pair the LLM's scored criteria with the rubric items they belong to."""
+    if not isinstance(parsed, list):
+        logger.error(f"Scoring response: {parsed}")
+        raise HTTPException(status_code=500, detail="Scoring LLM response is not a list")
+
+    # Match results to criteria by name; a result already claimed by name is
+    # never reused for another criterion
+    results_by_crit = {}
+    for i, m in enumerate(parsed):
+        results_by_crit.setdefault(m["criterion"].strip().casefold(), i)
+
+    matched = {}
+    for j, item in enumerate(rubric):
+        i = results_by_crit.get(item["key"].strip().casefold())
+        if i is not None:
+            matched[j] = i
+    matched.update(_unmatched_pairs(rubric, parsed, matched))
+
+    return [_build_match(item, parsed[matched[j]]) for j, item in enumerate(rubric)]
+
+class _StreamMatcher:
+    """
+    Applies the _match_results rule to results arriving one at a time. A
+    result whose criterion name matches is released as soon as it arrives;
+    the rest are paired with the leftover criteria in finish(), and only
+    when the model returned exactly one result per criterion.
+    """
+
+    def __init__(self, rubric: List[dict]):
+        self._rubric = rubric
+        self._by_name = {item["key"].strip().casefold(): j for j, item in enumerate(rubric)}
+        self._received = []
+        self._matched = {}  # rubric index -> received index, for released matches
+
+    def add(self, scored: dict) -> Optional[LLMMatch]:
+        self._received.append(scored)
+        j = self._by_name.get(scored["criterion"].strip().casefold())
+        if j is None or j in self._matched:
+            return None
+        self._matched[j] = len(self._received) - 1
+        return _build_match(self._rubric[j], scored)
+
+    def finish(self) -> List[LLMMatch]:
+        pairs = _unmatched_pairs(self._rubric, self._received, self._matched)
+        self._matched.update(pairs)
+        return [_build_match(self._rubric[j], self._received[i]) for j, i in pairs]
+
+async def _score_criteria(essay_text: str, rubric: List[dict]) -> List[LLMMatch]:
+    """Score the essay against a group of rubric criteria with one Gemini call."""
+    parsed = await _generate_json(
+        _scoring_prompt(essay_text, rubric),
+        list[ScoreOutput],
+        _max_output_tokens(200 * len(rubric)),
+    )
+    return _match_results(rubric, parsed)
+
+async def _score_essays(essays: List[EssayIn], rubric: List[dict]) -> dict:
+    """Score several essays against a group of rubric criteria with one Gemini call."""
+    parsed = await _generate_json(
+        _batch_scoring_prompt(essays, rubric),
+        list[EssayScoreOutput],
+        _max_output_tokens(200 * len(rubric) * len(essays)),
+    )
+    if not isinstance(parsed, list) or not all(
+        isinstance(entry, dict) and "id" in entry and "matches" in entry for entry in parsed
+    ):
+        logger.error(f"Batch scoring response: {parsed}")
+        raise HTTPException(status_code=500, detail="Batch scoring LLM response is not a list of essays")
+    by_id = {str(entry["id"]).strip(): entry["matches"] for entry in parsed}
+
+    scores = {}
+    for essay in essays:
+        if essay.id.strip() not in by_id:
+            logger.error(f"Batch scoring response: {parsed}")
+            raise HTTPException(status_code=500, detail=f"Scoring LLM returned no result for essay {essay.id}")
+        scores[essay.id] = _match_results(rubric, by_id[essay.id.strip()])
+    return scores
+
+def _score_cache_key(rubric_id: str, essay_text: str) -> bytes:
+    return hashlib.blake2b(
+        rubric_id.encode("utf-8") + b"\0" + essay_text.encode("utf-8")
+    ).digest()
+
 @app.post("/score_essay", response_model=List[LLMMatch])
 async def score_essay(data: ScoreIn):
     logger.info(f"Scoring essay with rubric ID: {data.rubric_id}")
@@ -290,122 +567,189 @@ async def score_essay(data: ScoreIn):
         logger.error(f"Unknown rubric_id: {data.rubric_id}")
         raise HTTPException(status_code=404, detail="Unknown rubric_id")
     
-    if not genai_client:
+    if not app.state.genai_client:
         raise HTTPException(status_code=500, detail="Generative AI client not initialized")
     
     essay_text = data.essay_text
     rubric = parsed_rubrics[data.rubric_id]
     results: List[LLMMatch] = []
 
+    cache_key = _score_cache_key(data.rubric_id, essay_text)
+    if cache_key in scored_essays:
+        logger.info("Essay already scored against this rubric, returning cached")
+        return list(scored_essays[cache_key])
+
     logger.info(f"Processing {len(rubric)} criteria")
 
-    for item in rubric:
-        key = item["key"]
-        max_score = item["max_score"]
-        levels = item["levels"]
+    # Large rubrics are split into a few groups that are scored concurrently
+    chunks = [
+        rubric[i:i + SCORE_CHUNK_SIZE]
+        for i in range(0, len(rubric), SCORE_CHUNK_SIZE)
+    ]
+    outcomes = await asyncio.gather(
+        *(_score_criteria(essay_text, chunk) for chunk in chunks),
+        return_exceptions=True,
+    )
+
+    for outcome in outcomes:
+        if isinstance(outcome, HTTPException):
+            raise outcome
+        if isinstance(outcome, Exception):
+            logger.error(f"Error scoring essay: {outcome}")
+            logger.error("".join(traceback.format_exception(outcome)))
+            raise HTTPException(status_code=500, detail=f"Error scoring essay: {str(outcome)}")
+        results.extend(outcome)
+
+    scored_essays[cache_key] = results
+    logger.info(f"Successfully scored essay with {len(results)} criteria")
+    return list(results)
 
-        levels_block = ""
-        for level in sorted(levels.keys(), reverse=True):
-            desc = levels[level]
-            levels_block += f"{level} points: \"{desc}\"\n"
+@app.post("/score_essay_stream")
+async def score_essay_stream(data: ScoreIn):
+    """
+    Same scoring as /score_essay, streamed as Server-Sent Events: one
+    `data: <LLMMatch JSON>` event per criterion as soon as the model has
+    finished it, then an `event: done` (or `event: error`) terminator.
+    """
+    logger.info(f"Streaming essay score with rubric ID: {data.rubric_id}")
 
-        prompt = f"""
-Score this essay for the criterion "{key}" (max {max_score} points).
+    if data.rubric_id not in parsed_rubrics:
+        logger.error(f"Unknown rubric_id: {data.rubric_id}")
+        raise HTTPException(status_code=404, detail="Unknown rubric_id")
 
-Scoring guide:
-{levels_block}
+    if not app.state.genai_client:
+        raise HTTPException(status_code=500, detail="Generative AI client not initialized")
 
-Essay text:
-{essay_text}
+    essay_text = data.essay_text
+    rubric = parsed_rubrics[data.rubric_id]
+    cache_key = _score_cache_key(data.rubric_id, essay_text)
 
-Return ONLY this JSON format with no extra text:
-{{
-  "score": <integer_0_to_{max_score}>,
-  "snippet": <"supporting_sentence_from_essay_or_null">,
-  "suggestion": <"improvement_advice_or_null">
-}}
+    async def stream_chunk(chunk: List[dict], queue: asyncio.Queue):
+        """Score one group of criteria, queueing each match as soon as it is parsed."""
+        matcher = _StreamMatcher(chunk)
+        scanner = _JsonArrayScanner()
 
-JSON response:"""
-        try:
-            resp = genai_client.models.generate_content(
+        # Only the upstream call holds a Gemini slot; the client drains the
+        # queue at its own pace
+        async with _gemini_semaphore:
+            stream = await app.state.genai_client.aio.models.generate_content_stream(
                 model="gemini-2.0-flash-001",
-                contents=[prompt],
-                config=types.GenerateContentConfig(temperature=0.0, max_output_tokens=200),
+                contents=[_scoring_prompt(essay_text, chunk)],
+                config=_json_config(
+                    list[ScoreOutput], _max_output_tokens(200 * len(chunk))
+                ),
             )
-            raw = resp.candidates[0].content.parts[0].text.strip()
-            logger.info(f"AI response for criterion '{key}': {raw[:100]}...")
-            
-            # Strip markdown formatting if present
-            cleaned_raw = raw.strip()
-            if cleaned_raw.startswith('```json'):
-                cleaned_raw = cleaned_raw[7:]  # Remove ```json
-            if cleaned_raw.startswith('```'):
-                cleaned_raw = cleaned_raw[3:]   # Remove ```
-            if cleaned_raw.endswith('```'):
-                cleaned_raw = cleaned_raw[:-3]  # Remove trailing ```
-            cleaned_raw = cleaned_raw.strip()
-            
-            # Fix common JSON formatting issues
-            import re
-            # Fix unquoted keys: key: -> "key":
-            cleaned_raw = re.sub(r'\b(\w+):', r'"\1":', cleaned_raw)
-            # Fix double-quoted keys that got double-quoted: ""key"": -> "key":
-            cleaned_raw = re.sub(r'""([^"]+)"":', r'"\1":', cleaned_raw)
-            # Fix already quoted keys that got quoted again: "\"key\"": -> "key":
-            cleaned_raw = re.sub(r'"\\"([^"]+)\\"":', r'"\1":', cleaned_raw)
-            
-            try:
-                parsed = json.loads(cleaned_raw)
-                score_val = int(parsed["score"])
-                snippet_val = parsed.get("snippet")
-                suggestion_val = parsed.get("suggestion")
-                
-                # Validate score range
-                if score_val < 0 or score_val > max_score:
-                    logger.warning(f"Score {score_val} out of range for criterion {key}, clamping")
-                    score_val = max(0, min(score_val, max_score))
-                
-            except Exception as e:
-                # Try single quote fix
-                try:
-                    fixed_raw = cleaned_raw.replace("'", '"')
-                    fixed_raw = re.sub(r'(\w)"(\w)', r"\1'\2", fixed_raw)
-                    parsed = json.loads(fixed_raw)
-                    score_val = int(parsed["score"])
-                    snippet_val = parsed.get("snippet")
-                    suggestion_val = parsed.get("suggestion")
-                    
-                    if score_val < 0 or score_val > max_score:
-                        logger.warning(f"Score {score_val} out of range for criterion {key}, clamping")
-                        score_val = max(0, min(score_val, max_score))
-                except:
-                    logger.error(f"JSON parse error for {key}: {e}")
-                    logger.error(f"Raw response: {raw}")
-                    logger.error(f"Cleaned response: {cleaned_raw}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Scoring LLM JSON parse error for {key}: {e}\nRaw: {raw}"
-                    )
-            
-            results.append(
-                LLMMatch(
-                    criterion=key,
-                    score=score_val,
-                    max_score=max_score,
-                    snippet=snippet_val,
-                    suggestion=suggestion_val,
-                )
-            )
-            
-        except HTTPException:
-            raise
+            async for part in stream:
+                for obj in scanner.feed(part.text or ""):
+                    match = matcher.add(orjson.loads(obj))
+                    if match is not None:
+                        queue.put_nowait(match)
+
+        for match in matcher.finish():
+            queue.put_nowait(match)
+
+    async def events():
+        if cache_key in scored_essays:
+            logger.info("Returning cached essay score")
+            for match in scored_essays[cache_key]:
+                yield f"data: {match.model_dump_json()}\n\n"
+            yield "event: done\ndata: {}\n\n"
+            return
+
+        queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(stream_chunk(rubric[i:i + SCORE_CHUNK_SIZE], queue))
+            for i in range(0, len(rubric), SCORE_CHUNK_SIZE)
+        ]
+        producer = asyncio.gather(*tasks)
+        producer.add_done_callback(lambda _: queue.put_nowait(None))
+
+        results = {}
+        try:
+            while (match := await queue.get()) is not None:
+                results[match.criterion] = match
+                yield f"data: {match.model_dump_json()}\n\n"
+            producer.result()
+
+            scored_essays[cache_key] = [results[item["key"]] for item in rubric]
+            yield "event: done\ndata: {}\n\n"
         except Exception as e:
-            logger.error(f"Error processing criterion {key}: {e}")
+            logger.error(f"Error streaming essay score: {e}")
             logger.error(traceback.format_exc())
-            raise HTTPException(status_code=500, detail=f"Error processing criterion {key}: {str(e)}")
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield f"event: error\ndata: {orjson.dumps({'detail': detail}).decode()}\n\n"
+        finally:
+            # Stop any chunk still scoring if the client went away or one failed
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/score_essay_batch", response_model=List[EssayScores])
+async def score_essay_batch(data: BatchScoreIn):
+    """
+    Score several essays against one rubric. The rubric is split into
+    groups of SCORE_CHUNK_SIZE criteria as in /score_essay; for each group,
+    essays share a prompt (and so the scoring guide tokens and round-trip)
+    as long as their combined output fits the token budget. All calls run
+    concurrently.
+    """
+    logger.info(f"Batch scoring {len(data.essays)} essays with rubric ID: {data.rubric_id}")
 
-    logger.info(f"Successfully scored essay with {len(results)} criteria")
-    return results
+    if data.rubric_id not in parsed_rubrics:
+        logger.error(f"Unknown rubric_id: {data.rubric_id}")
+        raise HTTPException(status_code=404, detail="Unknown rubric_id")
+
+    if not app.state.genai_client:
+        raise HTTPException(status_code=500, detail="Generative AI client not initialized")
+
+    ids = [essay.id.strip() for essay in data.essays]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Essay ids must be unique")
+
+    rubric = parsed_rubrics[data.rubric_id]
+    scores = {}
+
+    # Essays already scored against this rubric come from the cache
+    todo = []
+    for essay in data.essays:
+        cache_key = _score_cache_key(data.rubric_id, essay.text)
+        if cache_key in scored_essays:
+            scores[essay.id] = list(scored_essays[cache_key])
+        else:
+            todo.append(essay)
+
+    # Split the rubric the same way /score_essay does, then pack as many
+    # essays into each call as that criteria group's output budget allows
+    calls = []
+    for i in range(0, len(rubric), SCORE_CHUNK_SIZE):
+        chunk = rubric[i:i + SCORE_CHUNK_SIZE]
+        per_call = max(1, MAX_OUTPUT_TOKENS // (200 * len(chunk)))
+        calls.extend((todo[j:j + per_call], chunk) for j in range(0, len(todo), per_call))
+    outcomes = await asyncio.gather(
+        *(_score_essays(group, chunk) for group, chunk in calls),
+        return_exceptions=True,
+    )
+
+    for essay in todo:
+        scores[essay.id] = []
+
+    for outcome in outcomes:
+        if isinstance(outcome, HTTPException):
+            raise outcome
+        if isinstance(outcome, Exception):
+            logger.error(f"Error batch scoring essays: {outcome}")
+            logger.error("".join(traceback.format_exception(outcome)))
+            raise HTTPException(status_code=500, detail=f"Error scoring essays: {str(outcome)}")
+        # Calls are ordered by criteria group, so this keeps rubric order
+        for essay_id, matches in outcome.items():
+            scores[essay_id].extend(matches)
+
+    for essay in todo:
+        scored_essays[_score_cache_key(data.rubric_id, essay.text)] = scores[essay.id]
+
+    logger.info(f"Successfully scored {len(data.essays)} essays in {len(calls)} calls")
+    return [EssayScores.model_construct(id=essay.id, matches=scores[essay.id]) for essay in data.essays]
 
 @app.post("/score_essay_pdf", response_model=List[LLMMatch])
 async def score_essay_pdf(
@@ -419,7 +763,7 @@ async def score_essay_pdf(
         raise HTTPException(status_code=404, detail="Unknown rubric_id")
     
     try:
-        essay_text = extract_text_or_ocr_from_pdf(essay_file)
+        essay_text = await run_in_threadpool(extract_text_or_ocr_from_pdf, essay_file)
         logger.info(f"Extracted {len(essay_text)} characters from PDF essay")
         return await score_essay(ScoreIn(rubric_id=rubric_id, essay_text=essay_text))
     except HTTPException:
@@ -432,26 +776,7 @@ async def score_essay_pdf(
 @app.post("/structure", response_model=List[Section])
 async def detect_sections(data: TextIn):
     logger.info(f"Detecting sections in text of length: {len(data.text)}")
-    
-    lines = data.text.split("\n")
-    sections, buffer = [], []
-    current = "Body"
-    hdr = re.compile(r"^(Introduction|Conclusion|Discussion)\b", re.I)
-    
-    def commit():
-        nonlocal buffer, current
-        if buffer:
-            sections.append(Section(name=current, text="\n".join(buffer).strip()))
-            buffer = []
-    
-    for l in lines:
-        if hdr.match(l):
-            commit()
-            current = hdr.match(l).group(1).title()
-        else:
-            buffer.append(l)
-    commit()
-    
+    sections = split_sections(data.text)
     logger.info(f"Detected {len(sections)} sections")
     return sections
 
@@ -461,27 +786,8 @@ async def structure_pdf(
 ):
     try:
         logger.info(f"Detecting sections in PDF: {essay_file.filename}")
-        essay_text = extract_text_or_ocr_from_pdf(essay_file)
-        
-        lines = essay_text.split("\n")
-        sections, buffer = [], []
-        current = "Body"
-        hdr = re.compile(r"^(Introduction|Conclusion|Discussion)\b", re.I)
-        
-        def commit():
-            nonlocal buffer, current
-            if buffer:
-                sections.append(Section(name=current, text="\n".join(buffer).strip()))
-                buffer = []
-        
-        for l in lines:
-            if hdr.match(l):
-                commit()
-                current = hdr.match(l).group(1).title()
-            else:
-                buffer.append(l)
-        commit()
-        
+        essay_text = await run_in_threadpool(extract_text_or_ocr_from_pdf, essay_file)
+        sections = split_sections(essay_text)
         logger.info(f"Detected {len(sections)} sections in PDF")
         return sections
     except Exception as e:
@@ -489,19 +795,6 @@ async def structure_pdf(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"PDF structure error: {e}")
 
-# Add startup event to check configuration
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting Rubric Analyzer API")
-    logger.info(f"Google Cloud Project: {os.environ.get('GOOGLE_CLOUD_PROJECT')}")
-    logger.info(f"Google Cloud Location: {os.environ.get('GOOGLE_CLOUD_LOCATION')}")
-    logger.info(f"Using Vertex AI: {os.environ.get('GOOGLE_GENAI_USE_VERTEXAI')}")
-    
-    if genai_client:
-        logger.info("Generative AI client is ready")
-    else:
-        logger.error("Generative AI client failed to initialize - check your Google Cloud setup")
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
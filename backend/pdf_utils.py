@@ -1,74 +1,175 @@
 import fitz  # PyMuPDF
 import io
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 import pytesseract
 import re
-from typing import List
+from typing import List, Optional
+
+# Extracted text keyed by the SHA-256 of the PDF bytes. The same upload is
+# usually sent to several endpoints (structure + scoring), and OCR dominates
+# their latency, so repeat uploads skip extraction entirely.
+_EXTRACT_CACHE_SIZE = 256
+_extract_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_extract_cache_lock = threading.Lock()
+
+# Worker processes for Tesseract, created lazily on the first scanned page
+_OCR_WORKERS = min(4, os.cpu_count() or 1)
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+
+# Pages with less extracted text than this (chars per 1000 pt²) are OCR'd.
+# A US Letter page needs only about 25 characters to pass, so short
+# born-digital pages keep their exact text; scans with a stray page number
+# or stamp still go to OCR
+_MIN_TEXT_DENSITY = 0.05
+_OCR_DPI = 200
+
+# Running headers/footers and table labels dropped by normalize_and_segment
+_HEADER_FOOTER_RE = re.compile(
+    r"AP® English Language and Composition.*"
+    r"|©\s*\d{4}\s*College Board"
+    r"|Reporting$|Category$|Scoring Criteria$"
+)
+
+# Line unwrapping for normalize_and_segment. Neither pattern may consume a
+# blank line ("\n\n"), so paragraph breaks survive.
+_HYPHEN_WRAP_RE = re.compile(r"-[^\S\n]*\n(?=[^\n])")
+_SOFT_BREAK_RE = re.compile(r"(?<!\n)\n(?!\n)")
+
+# Pattern for table-style rows (e.g., 'Row A Thesis (0-1 points)')
+_ROW_RE = re.compile(r'^Row\s+[A-Z]\s+(.+?)\s*\(\s*\d+(?:-\d+)?\s*points?\)', re.IGNORECASE)
+# Generic pattern for 'Name (0-# points)' at start of paragraph
+_GENERIC_RE = re.compile(r'^(.+?)\s*\(\s*\d+(?:-\d+)?\s*points?\)', re.IGNORECASE)
 
 
 def extract_text_or_ocr_from_pdf(uploaded_file) -> str:
     """
     Extracts text from a PDF file-like object.
-    Uses PyMuPDF for text extraction, and falls back to OCR via pytesseract if a page has no extractable text.
+    Uses PyMuPDF for text extraction, and falls back to OCR via pytesseract if a page has little or no extractable text.
+    Results are cached by file content, so re-uploading the same PDF is free.
     """
     # Reset file pointer and read bytes
     uploaded_file.file.seek(0)
     file_bytes = uploaded_file.file.read()
 
+    key = hashlib.sha256(file_bytes).digest()
+    with _extract_cache_lock:
+        cached = _extract_cache.get(key)
+        if cached is not None:
+            _extract_cache.move_to_end(key)
+            return cached
+
+    text = _extract_pdf_bytes(file_bytes)
+    with _extract_cache_lock:
+        _extract_cache[key] = text
+        if len(_extract_cache) > _EXTRACT_CACHE_SIZE:
+            _extract_cache.popitem(last=False)
+    return text
+
+
+def _extract_pdf_bytes(file_bytes: bytes) -> str:
     try:
         doc = fitz.open(stream=file_bytes, filetype="pdf")
     except Exception as e:
         raise ValueError(f"Could not open PDF: {e}")
 
     full_text = []
+    ocr_futures = {}
     for page_num in range(len(doc)):
         page = doc.load_page(page_num)
-        page_text = page.get_text()
-        if not page_text.strip():
-            # Fallback to OCR
-            pix = page.get_pixmap()
-            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-            page_text = pytesseract.image_to_string(img)
+        # Text blocks only (image blocks carry no text). A block is not a
+        # paragraph -- a table header can span several -- so join them with
+        # single newlines and leave paragraph breaks to normalize_and_segment
+        blocks = page.get_text("blocks")
+        page_text = "\n".join(b[4].rstrip("\n") for b in blocks if b[6] == 0)
+        # Characters per 1000 pt² of page; scanned pages often carry only a
+        # footer or page number, which is not enough text to trust
+        density = len(page_text.strip()) / max(1, page.rect.width * page.rect.height / 1000)
+        if density < _MIN_TEXT_DENSITY:
+            # Fallback to OCR: render here (PyMuPDF stays in this process) and
+            # hand the raw pixels to the pool so pages are OCR'd in parallel.
+            # Pages are only rasterised on this path, at a resolution Tesseract
+            # reads reliably.
+            pix = page.get_pixmap(dpi=_OCR_DPI)
+            ocr_futures[page_num] = _get_ocr_pool().submit(
+                _ocr_page, pix.samples, pix.width, pix.height
+            )
         full_text.append(page_text)
 
+    for page_num, future in ocr_futures.items():
+        page_text = full_text[page_num]
+        try:
+            ocr_text = future.result()
+        except Exception:
+            # OCR is only a fallback; keep whatever text the page did have
+            if not page_text.strip():
+                raise
+            continue
+        if len(ocr_text.strip()) > len(page_text.strip()):
+            full_text[page_num] = ocr_text
+
     return "\n\n".join(full_text)
 
 
+def _ocr_page(samples: bytes, width: int, height: int) -> str:
+    """OCR one rendered RGB page. Runs in an OCR pool worker process."""
+    img = Image.frombytes("RGB", (width, height), samples)
+    return pytesseract.image_to_string(img)
+
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """Return the shared OCR process pool, starting it on first use."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # spawn, not fork: the server process is multi-threaded
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=_OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Stop the OCR worker processes, if any were started."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
 def normalize_and_segment(text: str) -> List[str]:
     """
     Normalizes extracted text by removing headers/footers, unwrapping lines, and
     splitting into logical text blocks (paragraphs).
     Returns a list of cleaned paragraphs.
     """
-    lines = text.splitlines()
-    cleaned_lines = []
-    header_footer_patterns = [
-        r"AP® English Language and Composition.*",
-        r"©\s*\d{4}\s*College Board",
-        r"^Reporting$", r"^Category$", r"^Scoring Criteria$"
-    ]
-    for line in lines:
-        if any(re.match(pat, line.strip()) for pat in header_footer_patterns):
+    kept = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if _HEADER_FOOTER_RE.match(stripped):
             continue
-        cleaned_lines.append(line)
-
-    raw_paragraphs = []
-    paragraph = []
-    for line in cleaned_lines:
-        if not line.strip():
-            if paragraph:
-                raw_paragraphs.append("\n".join(paragraph))
-                paragraph = []
-        else:
-            paragraph.append(line)
-    if paragraph:
-        raw_paragraphs.append("\n".join(paragraph))
+        # Blank lines become "" so every paragraph break is at least "\n\n"
+        kept.append(line if stripped else "")
+
+    # Unwrap the whole buffer in two passes: join hyphenated line breaks, then
+    # turn the remaining single newlines (inside paragraphs) into spaces.
+    # Only paragraph breaks are left as newlines afterwards.
+    joined = _HYPHEN_WRAP_RE.sub("", "\n".join(kept))
+    joined = _SOFT_BREAK_RE.sub(" ", joined)
 
     normalized = []
-    for para in raw_paragraphs:
-        para = re.sub(r"-\s*\n", "", para)
-        para = re.sub(r"\n+", " ", para)
-        normalized.append(para.strip())
+    for para in joined.split("\n"):
+        para = para.strip()
+        if para:
+            normalized.append(para)
 
     return normalized
 
@@ -82,22 +183,21 @@ def parse_criteria_from_paragraphs(paragraphs: List[str]) -> List[str]:
     Returns a list of criterion names.
     """
     criteria = []
-    # Pattern for table-style rows (e.g., 'Row A Thesis (0-1 points)')
-    row_re = re.compile(r'^Row\s+[A-Z]\s+(.+?)\s*\(\s*\d+(?:-\d+)?\s*points?\)', re.IGNORECASE)
-    # Generic pattern for 'Name (0-# points)' at start of paragraph
-    generic_re = re.compile(r'^(.+?)\s*\(\s*\d+(?:-\d+)?\s*points?\)', re.IGNORECASE)
+    seen = set()
 
     for para in paragraphs:
         # Try the Row pattern first
-        m = row_re.match(para)
+        m = _ROW_RE.match(para)
         if m:
             name = m.group(1).strip()
             criteria.append(name)
+            seen.add(name)
             continue
         # Otherwise, try the generic pattern
-        m2 = generic_re.match(para)
+        m2 = _GENERIC_RE.match(para)
         if m2:
             name = m2.group(1).strip()
-            if name not in criteria:
+            if name not in seen:
                 criteria.append(name)
+                seen.add(name)
     return criteria
@@ -0,0 +1,84 @@
+import orjson
+from fastapi import HTTPException
+from backend.main import _JsonArrayScanner, _StreamMatcher
+
+RUBRIC = [
+    {"key": "Thesis", "max_score": 4},
+    {"key": "Evidence", "max_score": 4},
+    {"key": "Sophistication", "max_score": 1},
+]
+
+def stream_scores(rubric, results, piece=7):
+    """
+    Feeds the JSON array for `results` through the scanner in small pieces,
+    the way Gemini streams it, and returns every match the matcher releases.
+    """
+    raw = orjson.dumps(results).decode()
+    scanner = _JsonArrayScanner()
+    matcher = _StreamMatcher(rubric)
+    matches = []
+    for i in range(0, len(raw), piece):
+        for obj in scanner.feed(raw[i:i + piece]):
+            match = matcher.add(orjson.loads(obj))
+            if match is not None:
+                matches.append(match)
+    matches.extend(matcher.finish())
+    return {m.criterion: m.score for m in matches}
+
+def test_matches_by_name():
+    scores = stream_scores(RUBRIC, [
+        {"criterion": "evidence ", "score": 3},
+        {"criterion": "Thesis", "score": 1},
+        {"criterion": "Sophistication", "score": 0},
+    ])
+    assert scores == {"Thesis": 1, "Evidence": 3, "Sophistication": 0}
+
+def test_extra_result_does_not_shift_scores():
+    scores = stream_scores(RUBRIC, [
+        {"criterion": "Extra", "score": 0},
+        {"criterion": "Thesis", "score": 1},
+        {"criterion": "Evidence", "score": 4},
+        {"criterion": "Sophistication", "score": 1},
+    ])
+    assert scores == {"Thesis": 1, "Evidence": 4, "Sophistication": 1}
+
+def test_renamed_result_falls_back_to_position():
+    scores = stream_scores(RUBRIC, [
+        {"criterion": "Thesis", "score": 2},
+        {"criterion": "Use of Evidence", "score": 3},
+        {"criterion": "Sophistication", "score": 1},
+    ])
+    assert scores == {"Thesis": 2, "Evidence": 3, "Sophistication": 1}
+
+def test_reordered_renamed_result_does_not_reuse_a_match():
+    scores = stream_scores(RUBRIC, [
+        {"criterion": "Evidence", "score": 3},
+        {"criterion": "Thesis statement", "score": 1},
+        {"criterion": "Sophistication", "score": 0},
+    ])
+    assert scores == {"Thesis": 1, "Evidence": 3, "Sophistication": 0}
+
+def test_missing_result_is_an_error():
+    try:
+        stream_scores(RUBRIC, [
+            {"criterion": "Thesis", "score": 2},
+            {"criterion": "Extra", "score": 3},
+        ])
+    except HTTPException as e:
+        assert "Evidence" in e.detail and "Sophistication" in e.detail
+    else:
+        raise AssertionError("expected missing criteria to raise")
+
+def main():
+    for test in (
+        test_matches_by_name,
+        test_extra_result_does_not_shift_scores,
+        test_renamed_result_falls_back_to_position,
+        test_reordered_renamed_result_does_not_reuse_a_match,
+        test_missing_result_is_an_error,
+    ):
+        test()
+        print(f"{test.__name__}: ok")
+
+if __name__ == "__main__":
+    main()